@@ -5,13 +5,26 @@ import shlex
 import signal
 import subprocess
 import sys
+import textwrap
 import threading
 import time
 from getpass import getuser
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+try:
+    import lgpio
+except ImportError:
+    lgpio = None
 
 try:
     import RPi.GPIO as GPIO
@@ -22,24 +35,58 @@ except ImportError:
 
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s %(levelname)s %(message)s")
-stop = False
+stop_event = threading.Event()
 
 SERVICE_NAME = "kuma-uptime-beacon"
 SERVICE_FILE_TARGET = Path("/etc/systemd/system") / f"{SERVICE_NAME}.service"
 
+# resolved once at import; the service unit points at this interpreter and script
+_PYTHON_EXEC = Path(sys.executable).resolve()
+_SCRIPT_PATH = Path(__file__).resolve()
+_WORKING_DIR = _SCRIPT_PATH.parent
+_QUOTED_PYTHON = shlex.quote(str(_PYTHON_EXEC))
+_QUOTED_SCRIPT = shlex.quote(str(_SCRIPT_PATH))
+
+_UNIT_TEMPLATE = textwrap.dedent(
+    """\
+    [Unit]
+    Description=Uptime Kuma hardware beacon
+    After=network-online.target
+    Wants=network-online.target
+
+    [Service]
+    Type=simple
+    User={user}
+    Environment=PYTHONUNBUFFERED=1
+    WorkingDirectory={working_dir}
+    ExecStart={python} {script} start {config}
+    Restart=on-failure
+    RestartSec=5s
+
+    [Install]
+    WantedBy=multi-user.target"""
+)
+
+# (connect, read) timeouts for requests against Uptime Kuma
+REQUEST_TIMEOUT = (3.05, 10)
+# polling interval used in place of a zero or negative one, in seconds
+FALLBACK_INTERVAL = 1
+
+# the status page name→id topology rarely changes; reuse it for a while
+MAPPING_TTL = 300
+MAPPING_CACHE_FILE = Path.home() / ".cache" / "kuma-beacon" / "mapping.json"
+
 def handle_sigterm(*_):
-    global stop
     logging.info("Received SIGTERM, shutting down...")
-    stop = True
-
-signal.signal(signal.SIGTERM, handle_sigterm)
-signal.signal(signal.SIGINT, handle_sigterm)
+    stop_event.set()
 
-def run():
+def run(monitor: "StatusMonitor", interval: int) -> None:
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    signal.signal(signal.SIGINT, handle_sigterm)
     logging.info("Service started")
-    while not stop:
-        # do work here
-        time.sleep(1)
+    # poll on the main thread; SIGTERM/SIGINT set stop_event and wake the loop,
+    # so nothing wakes up between polls
+    monitor.run_periodic_check(interval)
     logging.info("Service stopped")
 
 
@@ -51,32 +98,15 @@ def _ensure_systemd_env() -> None:
 
 
 def _build_service_unit(config_path: str) -> str:
-    python_exec = Path(sys.executable).resolve()
-    script_path = Path(__file__).resolve()
-    working_dir = script_path.parent
-    quoted_python = shlex.quote(str(python_exec))
-    quoted_script = shlex.quote(str(script_path))
-    quoted_config = shlex.quote(str(Path(config_path).resolve()))
-
-    return "\n".join(
-        [
-            "[Unit]",
-            "Description=Uptime Kuma hardware beacon",
-            "After=network-online.target",
-            "Wants=network-online.target",
-            "",
-            "[Service]",
-            "Type=simple",
-            f"User={getuser()}",
-            "Environment=PYTHONUNBUFFERED=1",
-            f"WorkingDirectory={working_dir}",
-            f"ExecStart={quoted_python} {quoted_script} start {quoted_config}",
-            "Restart=on-failure",
-            "RestartSec=5s",
-            "",
-            "[Install]",
-            "WantedBy=multi-user.target",
-        ]
+    """Render the unit file; `config_path` must already be absolute (install_service resolves it)."""
+    return _UNIT_TEMPLATE.format_map(
+        {
+            "user": getuser(),
+            "working_dir": _WORKING_DIR,
+            "python": _QUOTED_PYTHON,
+            "script": _QUOTED_SCRIPT,
+            "config": shlex.quote(config_path),
+        }
     )
 
 
@@ -91,16 +121,14 @@ def install_service(config_path: str) -> None:
     logging.info("Service unit written to %s", SERVICE_FILE_TARGET)
 
     subprocess.run(["systemctl", "daemon-reload"], check=True)
-    subprocess.run(["systemctl", "enable", SERVICE_NAME], check=True)
-    subprocess.run(["systemctl", "start", SERVICE_NAME], check=True)
+    subprocess.run(["systemctl", "enable", "--now", SERVICE_NAME], check=True)
     logging.info("Service %s installed and started", SERVICE_NAME)
 
 
 def uninstall_service() -> None:
     _ensure_systemd_env()
 
-    subprocess.run(["systemctl", "disable", SERVICE_NAME], check=False)
-    subprocess.run(["systemctl", "stop", SERVICE_NAME], check=False)
+    subprocess.run(["systemctl", "disable", "--now", SERVICE_NAME], check=False)
 
     if SERVICE_FILE_TARGET.exists():
         SERVICE_FILE_TARGET.unlink()
@@ -131,29 +159,111 @@ def check_service_status() -> None:
 
 
 class StatusMonitor:
-    def __init__(self, base_url: str, slug: str, services : list = [], pin_mode: str = "BCM"):
+    # (base_url, slug) -> (monotonic timestamp, name→id mapping)
+    _mapping_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, int]]] = {}
+
+    def __init__(self, base_url: str, slug: str, services : list = [], pin_mode: str = "BCM",
+                 stop_event: Optional[threading.Event] = None):
         self.base_url = base_url.rstrip("/")
         self.slug = slug
         self.name_to_id: Dict[str, int] = {}
-        self.heartbeat_data: Dict[str, Any] = {}
-        self._stop_event = threading.Event()
+        # True when name_to_id came from the in-process cache rather than the server
+        self._mapping_from_cache = False
+        # monitor id (heartbeat key) -> latest heartbeat status, None if no heartbeats yet
+        self._last_status: Dict[str, Optional[int]] = {}
+        # service name -> last up/down state written to the log
+        self._reported: Dict[str, bool] = {}
+        # validators from the last heartbeat response, sent back for conditional GETs
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._stop_event = stop_event or threading.Event()
         self._thread: Union[threading.Thread, None] = None
         self.services = services
+        # (display name, pins, monitor id as heartbeat key, reverse) per enabled service
+        self._resolved: List[Tuple[str, List[int], str, bool]] = []
+        # lgpio chip handle and claimed output group, when driving pins through /dev/gpiochip0
+        self._chip: Optional[int] = None
+        self._group_bits: Dict[int, int] = {}
+        self._group_leader = 0
+
+        # one pooled keep-alive session so every poll reuses the same connection;
+        # only a single host is polled, one request at a time, so one slot is enough
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=1,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip"})
 
         self.fetch_status_page()
 
-        if pin_mode.upper() == "BCM":
-            GPIO.setmode(GPIO.BCM)
-        else:
-            GPIO.setmode(GPIO.BOARD)
-        
-
         for index, service in enumerate(self.services):
-            pin_list = self._normalize_pins(service["pin"])
-            self.services[index]["pin"] = pin_list
-            for pin in pin_list:
+            self.services[index]["pin"] = self._normalize_pins(service["pin"])
+
+        # lgpio addresses chip lines, which match BCM numbering only
+        if lgpio is not None and pin_mode.upper() == "BCM":
+            self._claim_lgpio_group()
+
+        if self._chip is None:
+            if pin_mode.upper() == "BCM":
+                GPIO.setmode(GPIO.BCM)
+            else:
+                GPIO.setmode(GPIO.BOARD)
+
+            for pin in self._enabled_pins():
                 GPIO.setup(pin, GPIO.OUT)
 
+        self._resolve_services()
+
+    def _resolve_services(self) -> None:
+        """Resolve each enabled service to its monitor id once, so polling does no lookups."""
+        if self._mapping_from_cache and any(
+            service.get("enabled", True) and not service.get("id") and service.get("name") not in self.name_to_id
+            for service in self.services
+        ):
+            # a cached mapping may predate a renamed or added monitor; ask the server before giving up
+            self.fetch_status_page(force=True)
+
+        resolved = []
+        for service in self.services:
+            if not service.get("enabled", True):
+                continue
+            service_id = service.get("id") or self.name_to_id.get(service.get("name") or "")
+            if service_id is None:
+                logging.warning("No monitor found for service %r; skipping", service.get("name"))
+                continue
+            key = str(service_id)
+            display_name = service.get("name") or self._monitor_name_for_id(service_id) or key
+            resolved.append((display_name, service["pin"], key, bool(service.get("reverse", False))))
+        self._resolved = resolved
+
+    def _enabled_pins(self) -> List[int]:
+        """Return the pins of every enabled service; disabled services are left untouched."""
+        return [pin for service in self.services if service.get("enabled", True) for pin in service["pin"]]
+
+    def _claim_lgpio_group(self) -> None:
+        """Claim every service pin as one lgpio output group so updates are a single ioctl."""
+        group = sorted(set(self._enabled_pins()))
+        if not group:
+            return
+        try:
+            chip = lgpio.gpiochip_open(0)
+        except lgpio.error as exc:
+            logging.warning("lgpio unavailable (%s); falling back to RPi.GPIO", exc)
+            return
+        try:
+            lgpio.group_claim_output(chip, group)
+        except lgpio.error as exc:
+            lgpio.gpiochip_close(chip)
+            logging.warning("Could not claim GPIO group with lgpio (%s); falling back to RPi.GPIO", exc)
+            return
+        self._chip = chip
+        self._group_bits = {pin: 1 << index for index, pin in enumerate(group)}
+        self._group_leader = group[0]
+
     def _normalize_pins(self, pin_value: Union[int, list]) -> list:
         if isinstance(pin_value, int):
             return [pin_value]
@@ -164,50 +274,108 @@ class StatusMonitor:
             return pins
         raise TypeError("Service pin must be an int or a collection of ints")
 
-    def fetch_status_page(self) -> None:
-        """Fetch and parse monitor name→id mapping."""
-        response = requests.get(f"{self.base_url}/api/status-page/{self.slug}")
-        print(f"{self.base_url}/api/status-page/{self.slug}")
-        response.raise_for_status()
-        data = response.json()
-
-        mapping = {}
-        for group in data.get("publicGroupList", []):
-            mapping[group["name"]] = group["id"]
-            for monitor in group.get("monitorList", []):
-                mapping[monitor["name"]] = monitor["id"]
-        self.name_to_id = mapping
+    def fetch_status_page(self, force: bool = False) -> None:
+        """Fetch and parse monitor name→id mapping, reusing an in-process copy within MAPPING_TTL."""
+        key = (self.base_url, self.slug)
+        cached = self._mapping_cache.get(key)
+        if not force and cached and time.monotonic() - cached[0] < MAPPING_TTL:
+            self.name_to_id = dict(cached[1])
+            self._mapping_from_cache = True
+            return
+
+        # the disk entry only supplies a validator; its body is used solely on a 304
+        disk = self._load_mapping_cache()
+        url = f"{self.base_url}/api/status-page/{self.slug}"
+        headers = {"If-None-Match": disk["etag"]} if disk and disk.get("etag") else {}
+        logging.debug("Fetching %s", url)
+        response = self._session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and disk:
+            mapping = disk["mapping"]
+            etag = response.headers.get("ETag") or disk.get("etag")
+        else:
+            response.raise_for_status()
+            data = json_loads(response.content)
+
+            mapping = {}
+            for group in data.get("publicGroupList", []):
+                mapping[group["name"]] = group["id"]
+                for monitor in group.get("monitorList", []):
+                    mapping[monitor["name"]] = monitor["id"]
+            etag = response.headers.get("ETag")
+
+        self._store_mapping(mapping)
+        self._mapping_from_cache = False
+        self._save_mapping_cache(mapping, etag)
+
+    def _store_mapping(self, mapping: Dict[str, int]) -> None:
+        # instances get their own copy so mutating one never leaks into the shared cache
+        self._mapping_cache[(self.base_url, self.slug)] = (time.monotonic(), dict(mapping))
+        self.name_to_id = dict(mapping)
+
+    def _load_mapping_cache(self) -> Optional[Dict[str, Any]]:
+        """Return the on-disk mapping entry for this status page, if any."""
+        try:
+            entries = json.loads(MAPPING_CACHE_FILE.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        entry = entries.get(f"{self.base_url}/{self.slug}") if isinstance(entries, dict) else None
+        return entry if isinstance(entry, dict) and "mapping" in entry else None
+
+    def _save_mapping_cache(self, mapping: Dict[str, int], etag: Optional[str]) -> None:
+        """Persist the mapping and its ETag so the next process launch can revalidate cheaply."""
+        try:
+            entries = json.loads(MAPPING_CACHE_FILE.read_text(encoding="utf-8"))
+            if not isinstance(entries, dict):
+                entries = {}
+        except (OSError, ValueError):
+            entries = {}
+        entries[f"{self.base_url}/{self.slug}"] = {
+            "fetched_at": time.time(),
+            "etag": etag,
+            "mapping": mapping,
+        }
+        try:
+            MAPPING_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            MAPPING_CACHE_FILE.write_text(json.dumps(entries), encoding="utf-8")
+        except OSError as exc:
+            logging.warning("Could not write mapping cache %s: %s", MAPPING_CACHE_FILE, exc)
 
     def fetch_heartbeat(self) -> None:
-        """Fetch latest heartbeat data."""
-        response = requests.get(f"{self.base_url}/api/status-page/heartbeat/{self.slug}")
+        """Fetch latest heartbeat data, keeping the previous data if the server reports 304."""
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+
+        response = self._session.get(
+            f"{self.base_url}/api/status-page/heartbeat/{self.slug}", headers=headers, timeout=REQUEST_TIMEOUT
+        )
+        if response.status_code == 304:
+            return
         response.raise_for_status()
-        self.heartbeat_data = response.json()
+        heartbeat_list = json_loads(response.content).get("heartbeatList", {})
+        # keep only the latest status per monitor instead of the full history
+        self._last_status = {
+            key: entries[-1].get("status") if entries else None
+            for key, entries in heartbeat_list.items()
+        }
+        self._etag = response.headers.get("ETag")
+        self._last_modified = response.headers.get("Last-Modified")
 
     def is_up(self, monitor_id: Union[int, str]) -> bool:
         """Return True if latest heartbeat status is 1."""
-        entries = self.heartbeat_data.get("heartbeatList", {}).get(str(monitor_id), [])
-        return bool(entries) and entries[-1].get("status") == 1
+        return self._last_status.get(str(monitor_id)) == 1
 
     def check_all(self) -> Dict[str, bool]:
         """Return dict of monitor name → up/down (True/False)."""
         self.fetch_heartbeat()
-        heartbeat_list = self.heartbeat_data.get("heartbeatList", {})
-        status_map: Dict[str, bool] = {}
-
-        for service in self.services:
-            service_id = service.get("id") or self.name_to_id.get(service.get("name") or "")
-            if service_id is None:
-                continue
-
-            key = str(service_id)
-            if key not in heartbeat_list:
-                continue
-
-            display_name = service.get("name") or self._monitor_name_for_id(service_id) or key
-            status_map[display_name] = self.is_up(service_id)
-
-        return status_map
+        last_status = self._last_status
+        return {
+            display_name: last_status[key] == 1
+            for display_name, _, key, _ in self._resolved
+            if key in last_status
+        }
 
     def _monitor_name_for_id(self, monitor_id: Union[int, str]) -> Union[str, None]:
         for name, mapped_id in self.name_to_id.items():
@@ -224,19 +392,42 @@ class StatusMonitor:
         self._thread = threading.Thread(target=self._run_periodic, args=(interval,), daemon=True)
         self._thread.start()
 
+    def run_periodic_check(self, interval: int = 30) -> None:
+        """Run periodic checks on the calling thread until the stop event is set."""
+        self._run_periodic(interval)
+
     def _run_periodic(self, interval: int):
-        """Background thread loop for periodic checks."""
+        """Loop for periodic checks; the stop event doubles as an interruptible sleep."""
+        # schedule against a monotonic deadline so fetch latency does not stretch the period
+        if interval <= 0:
+            logging.warning("Polling interval must be positive, got %s; using %s s instead", interval, FALLBACK_INTERVAL)
+            interval = FALLBACK_INTERVAL
+        next_tick = time.monotonic()
         while not self._stop_event.is_set():
             try:
-                status_dict = self.check_all()
-                self.update_gpio(status_dict)
-                if status_dict:
-                    print(f"\n[STATUS UPDATE] ({time.strftime('%H:%M:%S')})")
-                    for name, status in status_dict.items():
-                        print(f"{name}: {'UP' if status else 'DOWN'}")
+                self.fetch_heartbeat()
+                self.update_gpio()
+                self._log_status_changes()
             except Exception as e:
-                print(f"Error during check: {e}")
-            time.sleep(interval)
+                logging.error("Error during check: %s", e)
+
+            next_tick += interval
+            now = time.monotonic()
+            if next_tick < now:
+                # overran one or more ticks; skip them rather than firing back-to-back
+                next_tick += ((now - next_tick) // interval + 1) * interval
+            self._stop_event.wait(next_tick - now)
+
+    def _log_status_changes(self) -> None:
+        """Log a service at INFO only when its up/down state differs from the last report."""
+        last_status = self._last_status
+        for name, _, key, _ in self._resolved:
+            if key not in last_status:
+                continue
+            up = last_status[key] == 1
+            if self._reported.get(name) != up:
+                self._reported[name] = up
+                logging.info("%s: %s", name, "UP" if up else "DOWN")
 
     def stop_periodic_check(self) -> None:
         """Stop background periodic checks."""
@@ -245,25 +436,43 @@ class StatusMonitor:
             self._thread.join()
             self._thread = None
 
-    def update_gpio(self, status_dict: Optional[Dict[str, bool]] = None) -> None:
-        """Apply GPIO pin levels for services included in the status map."""
-        if status_dict is None:
-            status_dict = self.check_all()
-
-        for service in self.services:
-            service_id = service.get("id") or self.name_to_id.get(service.get("name") or "")
-            display_name = service.get("name") or self._monitor_name_for_id(service_id) or str(service_id)
-            if display_name not in status_dict:
+    def close(self) -> None:
+        """Stop periodic checks and release pooled HTTP connections."""
+        self.stop_periodic_check()
+        self._session.close()
+        if self._chip is not None:
+            lgpio.gpiochip_close(self._chip)
+            self._chip = None
+
+    def update_gpio(self) -> None:
+        """Apply GPIO pin levels from the latest heartbeat data in a single batched write."""
+        last_status = self._last_status
+        pins: List[int] = []
+        levels: List[bool] = []
+        for _, service_pins, key, reverse in self._resolved:
+            if key not in last_status:
                 continue
-
-            pins = service["pin"]
-            desired_high = status_dict[display_name]
-            if service.get("reverse", False):
-                desired_high = not desired_high
             # reverse allows inverted signaling without touching wiring
-            for pin in pins:
-                GPIO.output(pin, GPIO.HIGH if desired_high else GPIO.LOW)
-                
+            desired_high = (last_status[key] == 1) != reverse
+            pins.extend(service_pins)
+            levels.extend([desired_high] * len(service_pins))
+
+        if not pins:
+            return
+
+        if self._chip is not None:
+            bits = mask = 0
+            for pin, high in zip(pins, levels):
+                bit = self._group_bits[pin]
+                mask |= bit
+                if high:
+                    bits |= bit
+                else:
+                    bits &= ~bit
+            lgpio.group_write(self._chip, self._group_leader, bits, mask)
+        else:
+            # RPi.GPIO accepts parallel lists and loops over them in C
+            GPIO.output(pins, [GPIO.HIGH if high else GPIO.LOW for high in levels])
 
 
 # Example usage:
@@ -279,11 +488,13 @@ if __name__ == "__main__":
         config_path = sys.argv[2]
         with open(config_path, "r") as f:
             config = json.load(f)
-        print(config)
-        monitor = StatusMonitor(config["url"], config["slug"], config["services"], config.get("pin_mode", "BCM"))
-        #monitor._run_periodic(interval=10)  # Initial run
-        monitor.start_periodic_check(interval=config.get("interval", 10))  # Check every 10s
-        run()
+        logging.debug("Loaded config: %s", config)
+        monitor = StatusMonitor(config["url"], config["slug"], config["services"], config.get("pin_mode", "BCM"),
+                                stop_event=stop_event)
+        try:
+            run(monitor, interval=config.get("interval", 10))  # Check every 10s
+        finally:
+            monitor.close()
     elif sys.argv[1] == "service":
         if len(sys.argv) < 3:
             logging.error("Missing service action. Use install, status, or uninstall.")
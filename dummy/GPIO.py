@@ -1,17 +1,32 @@
-def setmode(mode):
-    print(f"GPIO setmode({mode}) called")
-def setup(pin, direction):
-    print(f"GPIO setup(pin={pin}, direction={direction}) called")
-def input(pin):
-    print(f"GPIO input(pin={pin}) called")
-    return False # Default return value
-def output(pin, value):
-    print(f"GPIO output(pin={pin}, value={value}) called")
-def cleanup():
-    print("GPIO cleanup() called")
+import os
+
+# set KUMA_GPIO_DEBUG to print every call; otherwise all calls are silent no-ops
+DEBUG = bool(os.environ.get("KUMA_GPIO_DEBUG"))
+
+def _noop(*args, **kwargs):
+    pass
+
+if DEBUG:
+    def setmode(mode):
+        print(f"GPIO setmode({mode}) called")
+    def setup(pin, direction):
+        print(f"GPIO setup(pin={pin}, direction={direction}) called")
+    def input(pin):
+        print(f"GPIO input(pin={pin}) called")
+        return False # Default return value
+    def output(pin, value):
+        print(f"GPIO output(pin={pin}, value={value}) called")
+    def cleanup():
+        print("GPIO cleanup() called")
+else:
+    setmode = setup = output = cleanup = _noop
+    def input(pin):
+        return False # Default return value
 
 BCM = "BCM"
 BOARD = "BOARD"
 OUT = "OUT"
 IN = "IN"
-# Add other functions as needed
\ No newline at end of file
+HIGH = 1
+LOW = 0
+# Add other functions as needed